@@ -1,9 +1,118 @@
-from flask import Flask, request
+from flask import Flask, Response, request, stream_with_context
+from markupsafe import Markup
+from collections import OrderedDict
+from contextlib import contextmanager
+import hashlib
+import mmap
+import re
+import shutil
 import subprocess
 import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
 
 app = Flask(__name__)
 
+# Highlight wrappers indexed by consensus class (0 = none, 1 = low, 2 = high)
+OPEN_TAGS = (b"", b"<em class='low'>", b"<em class='high'>")
+CLOSE_TAGS = (b"", b"</em>", b"</em>")
+
+# Rendered DOC alignments as UTF-8 bytes, keyed by (path, st_mtime_ns, st_size)
+_DOC_CACHE = OrderedDict()
+DOC_CACHE_SIZE = 16
+_DOC_CACHE_LOCK = threading.Lock()
+
+# HTML replacements for the single-character DOC consensus markers, applied
+# in one translate pass once the adjacent "][" and ")(" pairs are removed
+_MARK_TRANS = str.maketrans({
+    '[': '<em class="high">',
+    ']': '</em>',
+    '(': '<em class="low">',
+    ')': '</em>',
+})
+
+# A non-blank MSF line: the sequence name, then its (space-grouped) residues
+_MSF_LINE = re.compile(r"^[^\S\n]*(\S+)[^\S\n]*(.*)$", re.M)
+
+# Consensus lines in the spellings MultiAlin and GCG write, kept out of the
+# sequences without lower-casing every name
+_MSF_SKIP = frozenset({"consensus", "Consensus", "CONSENSUS"})
+
+# Deletes all whitespace from a sequence in one translate call
+_WS_STRIP = str.maketrans('', '', ' \t\n\r\f\v')
+
+# Blank lines (possibly holding spaces or CRs) between edited sequence blocks
+_BLOCK_SEP = re.compile(r"\n\s*\n")
+
+# MultiAlin binary, its ma.cfg and symbol comparison tables live next to app.py
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# MultiAlin outputs, keyed by a hash of the submitted FASTA and of the
+# MultiAlin setup that produced them; the least recently used files beyond
+# CACHE_MAX_FILES are deleted whenever a new result is published
+CACHE_DIR = os.path.join(APP_DIR, "cache")
+CACHE_MAX_FILES = 500
+
+def _section_after_header(data):
+    # The header ends at the first line whose content starts with "//". Plain
+    # find() calls locate candidates much faster than a multiline regex, and
+    # only the text before each candidate on its line has to be checked
+    pos = data.find(b"//")
+    while pos != -1:
+        line_start = data.rfind(b"\n", 0, pos) + 1
+        if not data[line_start:pos].strip():
+            newline = data.find(b"\n", pos)
+            return data[newline + 1:] if newline != -1 else b""
+        pos = data.find(b"//", pos + 2)
+    return None
+
+def read_alignment_section(filepath):
+    """
+    Returns the text that follows the header of a MultiAlin DOC or MSF file,
+    i.e. everything after the first line starting with "//", or None if the
+    file has no such line.
+    The file is memory-mapped, so the header is skipped without being read into
+    Python objects; only the alignment section is copied and decoded. Files
+    with CR or CRLF line endings are read whole and normalised to LF before
+    the header search, as reading them in text mode would.
+    """
+    with open(filepath, 'rb') as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                lf_only = mm.find(b"\r") == -1
+                if lf_only:
+                    section = _section_after_header(mm)
+        except (ValueError, OSError):
+            # Empty files cannot be mapped; fall back to a plain read
+            lf_only = False
+        if not lf_only:
+            data = f.read().replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+            section = _section_after_header(data)
+    if section is None:
+        return None
+    return section.decode()
+
+def doc_text_to_html(text):
+    """
+    Converts the alignment section of a DOC file, already in memory, to HTML:
+    adjacent markers are dropped, the others become <em> tags, and the result
+    is wrapped in a <pre> block.
+    """
+    # Remove unwanted adjacent markers, then replace the others with HTML tags
+    # for coloring in a single scan of the text
+    text = text.replace("][", "").replace(")(", "").translate(_MARK_TRANS)
+    
+    # Wrap the result in a <pre> block
+    return f"<pre>{text}</pre>"
+
 def convert_doc_to_html(filepath):
     """
     Reads a DOC-format alignment file produced by MultiAlin.
@@ -12,38 +121,30 @@ def convert_doc_to_html(filepath):
        - Removes "][" and ")(".
        - Replaces "[" with <em class="high"> and "]" with </em>.
        - Replaces "(" with <em class="low"> and ")" with </em>.
-    Returns the resulting HTML string.
+    Returns the resulting HTML as UTF-8 bytes. Results are kept, encoded, in a
+    small LRU cache keyed by path, modification time and size, so viewing the
+    same alignment again skips the parse, the marker replacement and the
+    encoding.
     """
     try:
-        with open(filepath, 'r') as f:
-            lines = f.readlines()
+        st = os.stat(filepath)
+        key = (filepath, st.st_mtime_ns, st.st_size)
+        # Requests are served from several threads; the lookup and the
+        # reordering must not be split by another thread's eviction
+        with _DOC_CACHE_LOCK:
+            if key in _DOC_CACHE:
+                _DOC_CACHE.move_to_end(key)
+                return _DOC_CACHE[key]
+        text = read_alignment_section(filepath)
     except Exception as e:
-        return f"<p>Error reading DOC file: {e}</p>"
-    
-    # Find the line that begins with "//"
-    start_index = None
-    for i, line in enumerate(lines):
-        if line.strip().startswith("//"):
-            start_index = i + 1
-            break
-    if start_index is None:
-        return "<p>Could not locate alignment section in DOC file.</p>"
-    
-    # Join the remainder of the file (the alignment block)
-    text = "".join(lines[start_index:])
-    
-    # Remove unwanted adjacent markers
-    text = text.replace("][", "")
-    text = text.replace(")(", "")
-    
-    # Replace markers with HTML tags for coloring
-    text = text.replace("[", '<em class="high">')
-    text = text.replace("]", "</em>")
-    text = text.replace("(", '<em class="low">')
-    text = text.replace(")", "</em>")
-    
-    # Wrap the result in a <pre> block
-    html = f"<pre>{text}</pre>"
+        return f"<p>Error reading DOC file: {e}</p>".encode()
+    if text is None:
+        return b"<p>Could not locate alignment section in DOC file.</p>"
+    html = doc_text_to_html(text).encode()
+    with _DOC_CACHE_LOCK:
+        _DOC_CACHE[key] = html
+        if len(_DOC_CACHE) > DOC_CACHE_SIZE:
+            _DOC_CACHE.popitem(last=False)
     return html
 
 def parse_msf(filepath):
@@ -55,46 +156,20 @@ def parse_msf(filepath):
     Returns a list of (name, sequence) tuples.
     """
     sequences = {}
-    with open(filepath, 'r') as f:
-        lines = f.readlines()
-    start_index = 0
-    for i, line in enumerate(lines):
-        if line.strip().startswith("//"):
-            start_index = i + 1
-            break
-    current_block = []
-    for line in lines[start_index:]:
-        if not line.strip():
-            if current_block:
-                for block_line in current_block:
-                    parts = block_line.strip().split()
-                    if not parts:
-                        continue
-                    if parts[0].isdigit():
-                        continue
-                    if parts[0].lower() == "consensus":
-                        continue
-                    name = parts[0]
-                    segment = "".join(parts[1:])
-                    sequences.setdefault(name, "")
-                    sequences[name] += segment
-                current_block = []
-        else:
-            current_block.append(line)
-    if current_block:
-        for block_line in current_block:
-            parts = block_line.strip().split()
-            if not parts:
-                continue
-            if parts[0].isdigit():
-                continue
-            if parts[0].lower() == "consensus":
-                continue
-            name = parts[0]
-            segment = "".join(parts[1:])
-            sequences.setdefault(name, "")
-            sequences[name] += segment
-    return [(name, seq) for name, seq in sequences.items()]
+    data = read_alignment_section(filepath)
+    if data is None:
+        with open(filepath, 'r') as f:
+            data = f.read()
+    # Blocks are only separated by blank lines, so every sequence line can be
+    # handled in file order without grouping them first; one regex pass splits
+    # each non-blank line into its name and the rest
+    for name, segment in _MSF_LINE.findall(data):
+        if name in _MSF_SKIP or name.isdigit():
+            continue
+        # Collect segments and join once: repeated += would copy each
+        # sequence again for every block
+        sequences.setdefault(name, []).append(segment.translate(_WS_STRIP))
+    return [(name, "".join(segments)) for name, segments in sequences.items()]
 
 def plain_text_alignment(sequences, line_length=60):
     """
@@ -116,75 +191,473 @@ def parse_editable_alignment(text):
     Expects each sequence block to have the name on the first line followed by sequence lines.
     """
     sequences = []
-    blocks = text.strip().split("\n\n")
+    # Browsers post textarea contents with CRLF line breaks, so blocks are
+    # split on any blank line rather than on "\n\n" only
+    blocks = _BLOCK_SEP.split(text.strip())
     for block in blocks:
-        lines = block.strip().splitlines()
-        if not lines:
+        name, _, body = block.strip().partition("\n")
+        if not name:
             continue
-        name = lines[0].strip()
-        seq = "".join(line.strip() for line in lines[1:])
-        sequences.append((name, seq))
+        sequences.append((name.strip(), body.translate(_WS_STRIP)))
     return sequences
 
-def highlight_columns(seq_chars, high_thresh=0.90, low_thresh=0.50):
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def _score_columns(arr, high_thresh, low_thresh):
+        """
+        Numba kernel for highlight_columns: one small 256-bin histogram per
+        column, with the columns spread across threads.
+        """
+        num_seqs, align_len = arr.shape
+        col_class = np.zeros(align_len, np.uint8)
+        col_majority = np.zeros(align_len, np.uint8)
+        for col in numba.prange(align_len):
+            hist = np.zeros(256, np.int32)
+            for row in range(num_seqs):
+                hist[arr[row, col]] += 1
+            # A gap (or padding) held by most rows is the majority: no scan needed
+            if hist[ord('-')] * 2 > num_seqs:
+                col_majority[col] = ord('-')
+                continue
+            if hist[ord(' ')] * 2 > num_seqs:
+                col_majority[col] = ord(' ')
+                continue
+            # The first row reaching the top count wins ties, as with Counter
+            best = 0
+            for row in range(num_seqs):
+                if hist[arr[row, col]] > best:
+                    best = hist[arr[row, col]]
+                    col_majority[col] = arr[row, col]
+            if col_majority[col] == ord('-') or col_majority[col] == ord(' '):
+                continue
+            freq = best / num_seqs
+            if freq >= high_thresh:
+                col_class[col] = 2
+            elif freq >= low_thresh:
+                col_class[col] = 1
+        return col_class, col_majority
+    # Compile at import, without running it: gunicorn --preload workers then
+    # share the machine code, and no thread pool is started before the fork
+    _score_columns.compile((numba.types.Array(numba.uint8, 2, 'C', readonly=True),
+                            numba.float64, numba.float64))
+
+    _TAG_OPEN_LOW = np.frombuffer(OPEN_TAGS[1], np.uint8)
+    _TAG_OPEN_HIGH = np.frombuffer(OPEN_TAGS[2], np.uint8)
+    _TAG_CLOSE = np.frombuffer(CLOSE_TAGS[1], np.uint8)
+
+    @numba.njit(cache=True)
+    def _put(out, pos, data):
+        for k in range(data.shape[0]):
+            out[pos + k] = data[k]
+        return pos + data.shape[0]
+
+    @numba.njit(cache=True)
+    def _emit_row(row, col_class, col_majority, chunk_size, out):
+        """
+        Numba kernel for _iter_snippet: writes the chunk lines of one sequence
+        into out, wrapping runs in <em> tags while it walks the residues once.
+        Returns the number of bytes written.
+        """
+        pos = 0
+        current = 0
+        for col in range(row.shape[0]):
+            cls = col_class[col] if row[col] == col_majority[col] else 0
+            if cls != current:
+                if current != 0:
+                    pos = _put(out, pos, _TAG_CLOSE)
+                if cls == 2:
+                    pos = _put(out, pos, _TAG_OPEN_HIGH)
+                elif cls == 1:
+                    pos = _put(out, pos, _TAG_OPEN_LOW)
+                current = cls
+            out[pos] = row[col]
+            pos += 1
+            if (col + 1) % chunk_size == 0 or col + 1 == row.shape[0]:
+                if current != 0:
+                    pos = _put(out, pos, _TAG_CLOSE)
+                    current = 0
+                out[pos] = ord('\n')
+                pos += 1
+        return pos
+    _emit_row.compile((numba.types.Array(numba.uint8, 1, 'C', readonly=True),
+                       numba.uint8[::1], numba.uint8[::1], numba.int64, numba.uint8[::1]))
+    _KERNEL_LOCK = threading.Lock()
+else:
+    _score_columns = None
+    _emit_row = None
+
+def highlight_columns(arr, high_thresh=0.90, low_thresh=0.50):
+    """
+    For each column in the alignment (provided as a (rows, columns) uint8 matrix),
+    applies color coding based on majority rule. Returns two per-column uint8
+    arrays: the column class (2 for high consensus, 1 for low, 0 otherwise) and
+    the majority residue. A residue is highlighted only where it equals the
+    majority of its column.
+    """
+    num_seqs, align_len = arr.shape
+    if num_seqs == 0 or align_len == 0:
+        return np.zeros(align_len, dtype=np.uint8), np.zeros(align_len, dtype=np.uint8)
+    if _score_columns is not None:
+        # Numba's default workqueue threading layer aborts the process when a
+        # parallel kernel is entered from two threads at once
+        with _KERNEL_LOCK:
+            return _score_columns(arr, high_thresh, low_thresh)
+    # A gap (or padding) held by more than half of the rows is the majority
+    # whatever the other rows hold; settle those columns before counting
+    col_class = np.zeros(align_len, dtype=np.uint8)
+    col_majority = np.zeros(align_len, dtype=np.uint8)
+    for gap in (ord('-'), ord(' ')):
+        col_majority[(arr == gap).sum(axis=0) * 2 > num_seqs] = gap
+    todo = np.flatnonzero(col_majority == 0)
+    if todo.size == 0:
+        return col_class, col_majority
+    sub = arr[:, todo]
+    cols = np.arange(todo.size)
+    # One 256-bin histogram per column, all filled by a single bincount
+    counts = np.bincount((cols * 256 + sub).ravel(), minlength=256 * todo.size)
+    counts = counts.reshape(todo.size, 256)
+    row_counts = counts[cols, sub]
+    best = row_counts.max(axis=0)
+    # Break ties the way Counter.most_common does: first character seen wins
+    first_row = (row_counts == best).argmax(axis=0)
+    maj = sub[first_row, cols]
+    freq = best / num_seqs
+    # Class without branching: one point per threshold reached, zero for gaps
+    sub_class = (freq >= low_thresh).astype(np.uint8) + (freq >= high_thresh).astype(np.uint8)
+    sub_class *= (maj != ord('-')) & (maj != ord(' '))
+    col_class[todo] = sub_class
+    col_majority[todo] = maj
+    return col_class, col_majority
+
+def _wrap_row(residues, row_class, chunk_size):
+    """
+    Formats one row of the alignment (a uint8 slice of the matrix) as lines of
+    chunk_size residues, wrapping each run of equally classed residues in a
+    single <em> tag. The row is appended to one bytearray; runs are also split
+    at the chunk boundaries, so no per-chunk slices have to be joined.
+    """
+    text = residues.tobytes()
+    buf = bytearray()
+    if not text:
+        return buf
+    # Plain Python ints index the tag tables and slice text much faster than
+    # NumPy scalars do
+    breaks = np.flatnonzero(np.diff(row_class)) + 1
+    chunk_starts = np.arange(chunk_size, len(text), chunk_size)
+    starts = [0, *np.union1d(breaks, chunk_starts).tolist()]
+    classes = row_class[starts].tolist()
+    for start, end, cls in zip(starts, [*starts[1:], len(text)], classes):
+        buf += OPEN_TAGS[cls]
+        buf += text[start:end]
+        buf += CLOSE_TAGS[cls]
+        if end % chunk_size == 0 or end == len(text):
+            buf += b"\n"
+    return buf
+
+def encode_alignment(sequences):
+    """
+    Encodes a list of (name, sequence) tuples as one contiguous (rows, columns)
+    uint8 matrix of residue codes, one byte per cell.
+    Shorter sequences are padded with spaces to the longest one, so ragged
+    (hand-edited) alignments stay rectangular; non-ASCII characters become "?".
+    Returns (arr, names).
+    """
+    names = [name for name, _ in sequences]
+    align_len = max((len(seq) for _, seq in sequences), default=0)
+    raw = "".join(seq.ljust(align_len) for _, seq in sequences).encode('ascii', 'replace')
+    arr = np.frombuffer(raw, dtype=np.uint8).reshape(len(sequences), align_len)
+    return arr, names
+
+def analyze(sequences, high_thresh=0.90, low_thresh=0.50):
     """
-    For each column in the alignment (provided as a list of lists of characters),
-    applies color coding based on majority rule. Modifies seq_chars in-place.
+    Runs the consensus pass once over a list of (name, sequence) tuples.
+    Returns (arr, col_class, col_majority): the matrix from encode_alignment
+    plus the per-column results of highlight_columns, or None when there are
+    no sequences.
     """
-    import collections
-    num_seqs = len(seq_chars)
-    if num_seqs == 0:
+    if not sequences:
+        return None
+    arr, _ = encode_alignment(sequences)
+    col_class, col_majority = highlight_columns(arr, high_thresh, low_thresh)
+    return arr, col_class, col_majority
+
+def _iter_snippet(sequences, analysis, chunk_size=60):
+    """
+    Yields the color-coded snippet view one sequence block at a time, so it can
+    be streamed to the client while the remaining blocks are still being
+    formatted, without a separate write for every 60-character line.
+    analysis is the result of analyze(sequences); this is a pure formatter.
+    The markup is produced as bytes, ready to be sent without re-encoding.
+    """
+    if not sequences:
+        yield b"<p>No alignment results available.</p>"
         return
-    align_len = len(seq_chars[0])
-    for row in seq_chars:
-        if len(row) != align_len:
-            return
-    for col_idx in range(align_len):
-        col = [seq_chars[row_idx][col_idx] for row_idx in range(num_seqs)]
-        counter = collections.Counter(col)
-        most_common_char, count = counter.most_common(1)[0]
-        freq = count / num_seqs
-        if most_common_char in ('-', ' '):
+    arr, col_class, col_majority = analysis
+    align_len = arr.shape[1]
+    if _emit_row is not None:
+        # Worst case: every residue is its own highlighted run, plus one
+        # newline per chunk
+        n_chunks = -(-align_len // chunk_size)
+        cell_size = len(OPEN_TAGS[2]) + 1 + len(CLOSE_TAGS[2])
+        out = np.empty(align_len * cell_size + n_chunks, dtype=np.uint8)
+    else:
+        # Only highlighted columns can produce highlighted cells, so compare
+        # just those against their majority, in one vectorised pass
+        hot = np.flatnonzero(col_class)
+        cell_class = np.zeros(arr.shape, dtype=np.uint8)
+        is_majority = arr[:, hot] == col_majority[hot]
+        cell_class[:, hot] = np.where(is_majority, col_class[hot], 0)
+    yield b"<pre class='seq'>"
+    for i, (name, seq) in enumerate(sequences):
+        # Rows padded for the consensus pass are printed only up to their own
+        # length
+        n = len(seq)
+        if _emit_row is not None:
+            used = _emit_row(arr[i, :n], col_class[:n], col_majority[:n], chunk_size, out)
+            yield f"{name}\n".encode() + out[:used].tobytes() + b"\n"
             continue
-        if freq >= high_thresh:
-            for row_idx in range(num_seqs):
-                if seq_chars[row_idx][col_idx] == most_common_char:
-                    seq_chars[row_idx][col_idx] = f"<em class='high'>{most_common_char}</em>"
-        elif freq >= low_thresh:
-            for row_idx in range(num_seqs):
-                if seq_chars[row_idx][col_idx] == most_common_char:
-                    seq_chars[row_idx][col_idx] = f"<em class='low'>{most_common_char}</em>"
+        block = _wrap_row(arr[i, :n], cell_class[i, :n], chunk_size)
+        yield f"{name}\n".encode() + block + b"\n"
+    yield b"</pre>"
 
 def mode3_full_snippet(sequences, chunk_size=60):
     """
     Displays each sequence on its own (name on top, then the sequence in 60-char lines)
     with color-coding applied.
+    Returns the HTML as bytes.
     """
-    if not sequences:
-        return "<p>No alignment results available.</p>"
-    seq_chars = [list(seq) for _, seq in sequences]
-    highlight_columns(seq_chars, high_thresh=0.90, low_thresh=0.50)
-    align_len = len(seq_chars[0])
-    html_out = []
-    style_block = """
-<style>
-pre.seq { font-family: monospace; white-space: pre; }
-em.high { color: red; font-weight: bold; }
-em.low  { color: blue; font-weight: bold; }
-</style>
-"""
-    html_out.append(style_block)
-    html_out.append("<pre class='seq'>")
-    for i, (name, _) in enumerate(sequences):
-        html_out.append(f"{name}\n")
-        modded_seq = seq_chars[i]
-        for chunk_start in range(0, align_len, chunk_size):
-            chunk_end = min(chunk_start + chunk_size, align_len)
-            chunk_slice = "".join(modded_seq[chunk_start:chunk_end])
-            html_out.append(chunk_slice + "\n")
-        html_out.append("\n")
-    html_out.append("</pre>")
-    return "".join(html_out)
+    return b"".join(_iter_snippet(sequences, analyze(sequences), chunk_size))
+
+# MultiAlin command line, run from a private working directory holding the
+# input; MULTALIN points it at the comparison tables next to app.py
+MA_COMMAND = [os.path.join(APP_DIR, 'ma'), '-o:doc', '-r', 'temp_input.fasta']
+MA_ENV = {**os.environ, 'MULTALIN': APP_DIR + os.sep}
+
+def _setup_hash():
+    # A changed binary or ma.cfg (scoring table, gap values, consensus levels)
+    # gives every input a new key, so stale alignments are never served
+    h = hashlib.blake2b(digest_size=16)
+    for name in ('ma', 'ma.cfg'):
+        with open(os.path.join(APP_DIR, name), 'rb') as f:
+            h.update(hashlib.blake2b(f.read()).digest())
+    return h
+
+_SETUP_HASH = _setup_hash()
+
+def _cache_file(raw_sequences):
+    h = _SETUP_HASH.copy()
+    h.update(raw_sequences.encode())
+    return os.path.join(CACHE_DIR, f"{h.hexdigest()}.doc")
+
+def _cache_hit(output_file):
+    # A hit has its access time bumped so it is not evicted as the least
+    # recently used file; the modification time is kept, as it is part of the
+    # _DOC_CACHE key
+    try:
+        st = os.stat(output_file)
+        os.utime(output_file, ns=(time.time_ns(), st.st_mtime_ns))
+    except FileNotFoundError:
+        return False
+    return True
+
+def _prune_cache():
+    """
+    Deletes the least recently used DOC files until at most CACHE_MAX_FILES
+    remain. Files another process removed first are skipped.
+    """
+    entries = []
+    with os.scandir(CACHE_DIR) as it:
+        for entry in it:
+            if entry.name.endswith('.doc'):
+                try:
+                    entries.append((entry.stat().st_atime_ns, entry.path))
+                except FileNotFoundError:
+                    pass
+    if len(entries) <= CACHE_MAX_FILES:
+        return
+    entries.sort()
+    for _, path in entries[:len(entries) - CACHE_MAX_FILES]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+@contextmanager
+def _multalin_workspace(raw_sequences, output_file):
+    """
+    Context manager for one MultiAlin run: yields a private working directory
+    holding the FASTA input and a copy of ma.cfg, in which the caller runs
+    MultiAlin. If the block completes, the DOC file it wrote (if any) is
+    published to output_file with an atomic rename; the directory is removed
+    in every case.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Besides the DOC file, MultiAlin writes a cluster file and rewrites ma.cfg
+    # in its current directory, which concurrent requests would otherwise share
+    with tempfile.TemporaryDirectory(dir=CACHE_DIR) as work_dir:
+        with open(os.path.join(work_dir, 'temp_input.fasta'), 'w') as f:
+            f.write(raw_sequences)
+        shutil.copy(os.path.join(APP_DIR, 'ma.cfg'), work_dir)
+        yield work_dir
+        try:
+            os.replace(os.path.join(work_dir, 'temp_input.doc'), output_file)
+        except FileNotFoundError:
+            return
+    _prune_cache()
+
+def run_multalin(raw_sequences):
+    """
+    Runs MultiAlin with DOC output options on the given FASTA text.
+    Results are cached on disk under a BLAKE2b hash of the input and of the
+    MultiAlin setup, so submitting the same sequences again skips the alignment
+    entirely.
+    Returns the path of the DOC file, or None if no output file was created.
+    """
+    output_file = _cache_file(raw_sequences)
+    if _cache_hit(output_file):
+        return output_file
+    try:
+        with _multalin_workspace(raw_sequences, output_file) as work_dir:
+            # MultiAlin has no stdout output mode, so only its progress
+            # messages are piped (and dropped); a failed run, which is not
+            # published, is told by its exit status
+            subprocess.run(MA_COMMAND, cwd=work_dir, env=MA_ENV,
+                           capture_output=True, check=True)
+    except subprocess.CalledProcessError:
+        return None
+    return output_file if os.path.exists(output_file) else None
+
+# MultiAlin never flushes stdout, so through a pipe its progress would only
+# arrive in 4 KB blocks (all at exit for a small job). Where coreutils' stdbuf
+# is available the stream is run with unbuffered stdout instead; elsewhere the
+# progress events are coarse.
+_STDBUF = shutil.which('stdbuf')
+MA_STREAM_COMMAND = [_STDBUF, '-o0', *MA_COMMAND] if _STDBUF else MA_COMMAND
+
+# Size, in bytes, of the pieces the DOC HTML is streamed in on /align/stream
+STREAM_CHUNK_SIZE = 16384
+
+# MultiAlin redraws its counters with backspaces
+_BACKSPACES = re.compile(r"\s*\x08+\s*")
+
+def _sse(event, data=b""):
+    # Every line of the (bytes) payload needs its own data field
+    fields = data.replace(b"\n", b"\ndata: ")
+    return b"event: %s\ndata: %s\n\n" % (event.encode(), fields)
+
+def iter_alignment_events(raw_sequences):
+    """
+    Runs MultiAlin like run_multalin, yielding Server-Sent Events as it goes:
+    a "progress" event for each status line MultiAlin prints (see
+    MA_STREAM_COMMAND), then the lines of the DOC alignment's <pre> block as
+    HTML in "alignment" events of about STREAM_CHUNK_SIZE bytes, and a final
+    "done" event. A failed alignment ends with an "error" event.
+    """
+    output_file = _cache_file(raw_sequences)
+    if not _cache_hit(output_file):
+        try:
+            with _multalin_workspace(raw_sequences, output_file) as work_dir:
+                # Universal newlines also end a line at each \r, so each
+                # redraw of the progress line becomes its own event
+                with subprocess.Popen(MA_STREAM_COMMAND, cwd=work_dir, env=MA_ENV, text=True,
+                                      errors='replace', stdout=subprocess.PIPE,
+                                      stderr=subprocess.STDOUT) as proc:
+                    for line in proc.stdout:
+                        status = _BACKSPACES.sub(" ", line).strip()
+                        if status:
+                            yield _sse("progress", status.encode())
+                if proc.returncode != 0:
+                    raise subprocess.CalledProcessError(proc.returncode, MA_COMMAND)
+        except subprocess.CalledProcessError:
+            pass
+        if not os.path.exists(output_file):
+            yield _sse("error", b"Alignment failed or no output file was created.")
+            return
+    html = convert_doc_to_html(output_file)
+    if not html.startswith(b"<pre>"):
+        # A read error, already worded as a <p> paragraph
+        yield _sse("error", html[len(b"<p>"):-len(b"</p>")])
+        return
+    # The page supplies the <pre> block, so only its lines are sent. The
+    # cached bytes are sliced at the first line break past every
+    # STREAM_CHUNK_SIZE bytes: no piece splits a character, and as each DOC
+    # line closes its own markers, every piece can be appended as it arrives
+    start, stop = len(b"<pre>"), len(html) - len(b"</pre>")
+    while start < stop:
+        end = html.find(b"\n", start + STREAM_CHUNK_SIZE, stop)
+        end = stop if end == -1 else end + 1
+        yield _sse("alignment", html[start:end])
+        start = end
+    yield _sse("done")
+
+# Pages are rendered from templates/ with the shared static/style.css. The
+# templates are compiled once here, and pages whose content never changes are
+# rendered once up front and kept as encoded bytes.
+_EDIT_TEMPLATE = app.jinja_env.get_template("edit.html")
+_MESSAGE_TEMPLATE = app.jinja_env.get_template("message.html")
+_RESULTS_TEMPLATE = app.jinja_env.get_template("results.html")
+
+# Placeholder marking where streamed alignment content goes in a results page
+_CONTENT_SLOT = "\0alignment\0"
+
+def _results_page(title, heading, links):
+    """
+    Renders the results template around an empty slot and returns the
+    (head, tail) bytes on either side of it, for use with _stream_page.
+    """
+    page = _RESULTS_TEMPLATE.render(title=title, heading=heading, links=links,
+                                    alignment=Markup(_CONTENT_SLOT))
+    head, tail = page.split(_CONTENT_SLOT)
+    return head.encode(), tail.encode()
+
+# Heading and links of the DOC alignment result: on its own page after a plain
+# POST to /, and on the form page once static/align.js has streamed it in
+DOC_RESULT_HEADING = "Alignment Result (DOC Format)"
+DOC_RESULT_LINKS = [("/", "Go Back"), ("/edit", "Edit Alignment")]
+
+FORM_HTML = app.jinja_env.get_template("index.html").render(
+    heading=DOC_RESULT_HEADING, links=DOC_RESULT_LINKS).encode()
+
+NO_SEQS_HTML = _MESSAGE_TEMPLATE.render(
+    title="No Sequences Provided", back_url="/",
+    message="No sequences provided. Please paste FASTA sequences.").encode()
+
+NO_ALIGN_HTML = _MESSAGE_TEMPLATE.render(
+    title="Alignment Failed", back_url="/",
+    message="Alignment failed or no output file was created.").encode()
+
+NO_EDIT_TEXT_HTML = _MESSAGE_TEMPLATE.render(
+    title="No Alignment Provided", back_url="/edit",
+    message="No alignment text provided.").encode()
+
+# Page around the streamed DOC alignment on /
+DOC_RESULT_HEAD, DOC_RESULT_TAIL = _results_page(
+    "MultiAlin DOC Alignment", DOC_RESULT_HEADING, DOC_RESULT_LINKS)
+
+# Page around the streamed snippet view on /edit
+RECHECK_HEAD, RECHECK_TAIL = _results_page(
+    "Edited Alignment", "Rechecked Alignment",
+    [("/edit", "Edit Again"), ("/", "Go Back to Main")])
+
+# Every page is built as UTF-8 bytes, sent as is without another encode
+HTML_CONTENT_TYPE = 'text/html; charset=utf-8'
+
+def _html_page(body):
+    return Response(body, content_type=HTML_CONTENT_TYPE)
+
+def _stream_page(head, body, tail):
+    """
+    Returns a streamed HTML response: head is sent straight away, then each
+    piece yielded by the body iterable as soon as it is produced, then tail.
+    """
+    def generate():
+        yield head
+        yield from body
+        yield tail
+    return Response(stream_with_context(generate()), content_type=HTML_CONTENT_TYPE)
+
+def _iter_doc_html(filepath):
+    yield convert_doc_to_html(filepath)
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
@@ -192,182 +665,44 @@ def index():
     if request.method == 'POST':
         raw_sequences = request.form.get('sequences', '').strip()
         if not raw_sequences:
-            return """
-            <html>
-            <head>
-              <meta name="viewport" content="width=device-width, initial-scale=1">
-              <title>No Sequences Provided</title>
-              <style>
-                body { font-family: Arial, sans-serif; padding: 20px; }
-              </style>
-            </head>
-            <body>
-              <p>No sequences provided. Please paste FASTA sequences.</p>
-              <a href="/">Go Back</a>
-            </body>
-            </html>
-            """
-        with open('temp_input.fasta', 'w') as f:
-            f.write(raw_sequences)
-        # Remove previous DOC files
-        for file in os.listdir("."):
-            if file.startswith("temp_input.doc"):
-                os.remove(file)
-        # Run MultiAlin with DOC output options
-        subprocess.run([
-            './ma',
-            '-o:doc',
-            '-r',
-            'temp_input.fasta'
-        ])
-        output_file = "temp_input.doc"
-        if not os.path.exists(output_file):
-            return """
-            <html>
-            <head>
-              <meta name="viewport" content="width=device-width, initial-scale=1">
-              <title>Alignment Failed</title>
-              <style>
-                body { font-family: Arial, sans-serif; padding: 20px; }
-              </style>
-            </head>
-            <body>
-              <p>Alignment failed or no output file was created.</p>
-              <a href="/">Go Back</a>
-            </body>
-            </html>
-            """
-        alignment_html = convert_doc_to_html(output_file)
-        return f"""
-        <html>
-        <head>
-          <meta name="viewport" content="width=device-width, initial-scale=1">
-          <title>MultiAlin DOC Alignment</title>
-          <style>
-            body {{ font-family: Arial, sans-serif; padding: 20px; }}
-            pre {{ font-family: monospace; white-space: pre-wrap; }}
-            em.high {{ color: red; font-weight: bold; }}
-            em.low  {{ color: blue; font-weight: bold; }}
-            a {{ display: inline-block; margin-top: 20px; }}
-          </style>
-        </head>
-        <body>
-          <h1>Alignment Result (DOC Format)</h1>
-          {alignment_html}
-          <a href="/">Go Back</a>
-          <br>
-          <a href="/edit">Edit Alignment</a>
-        </body>
-        </html>
-        """
-    return """
-    <html>
-    <head>
-      <meta name="viewport" content="width=device-width, initial-scale=1">
-      <title>Submit Sequences</title>
-      <style>
-        body { font-family: Arial, sans-serif; padding: 20px; }
-        textarea { width: 100%; max-width: 600px; height: 200px; font-family: monospace; }
-        button { padding: 10px 20px; font-size: 16px; }
-      </style>
-    </head>
-    <body>
-      <h1>Submit FASTA Sequences for Alignment</h1>
-      <form method="POST">
-        <textarea name="sequences" placeholder="Paste FASTA sequences here"></textarea>
-        <br><br>
-        <button type="submit">Align</button>
-      </form>
-    </body>
-    </html>
-    """
+            return _html_page(NO_SEQS_HTML)
+        output_file = run_multalin(raw_sequences)
+        if output_file is None:
+            return _html_page(NO_ALIGN_HTML)
+        # The page head goes out before the DOC file is converted
+        return _stream_page(DOC_RESULT_HEAD, _iter_doc_html(output_file), DOC_RESULT_TAIL)
+    return _html_page(FORM_HTML)
+
+@app.route('/align/stream', methods=['POST'])
+def align_stream():
+    # Event stream behind the form on /: progress first, then the alignment
+    raw_sequences = request.form.get('sequences', '').strip()
+    if not raw_sequences:
+        events = [_sse("error", b"No sequences provided. Please paste FASTA sequences.")]
+    else:
+        events = iter_alignment_events(raw_sequences)
+    return Response(stream_with_context(events), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/edit', methods=['GET', 'POST'])
 def edit_alignment():
     if request.method == 'POST':
         edited_text = request.form.get('alignment_text', '').strip()
         if not edited_text:
-            return """
-            <html>
-            <head>
-              <meta name="viewport" content="width=device-width, initial-scale=1">
-              <title>No Alignment Provided</title>
-              <style>
-                body { font-family: Arial, sans-serif; padding: 20px; }
-              </style>
-            </head>
-            <body>
-              <p>No alignment text provided.</p>
-              <a href="/edit">Go Back</a>
-            </body>
-            </html>
-            """
+            return _html_page(NO_EDIT_TEXT_HTML)
         sequences = parse_editable_alignment(edited_text)
-        html_alignment = mode3_full_snippet(sequences, chunk_size=60)
-        return f"""
-        <html>
-        <head>
-          <meta name="viewport" content="width=device-width, initial-scale=1">
-          <title>Edited Alignment</title>
-          <style>
-            body {{ font-family: Arial, sans-serif; padding: 20px; }}
-            pre {{ font-family: monospace; white-space: pre-wrap; }}
-            em.high {{ color: red; font-weight: bold; }}
-            em.low  {{ color: blue; font-weight: bold; }}
-            a {{ display: inline-block; margin-top: 20px; }}
-          </style>
-        </head>
-        <body>
-          <h1>Rechecked Alignment</h1>
-          {html_alignment}
-          <br>
-          <a href="/edit">Edit Again</a>
-          <br>
-          <a href="/">Go Back to Main</a>
-        </body>
-        </html>
-        """
+        analysis = analyze(sequences)
+        return _stream_page(RECHECK_HEAD, _iter_snippet(sequences, analysis, chunk_size=60),
+                            RECHECK_TAIL)
     else:
         try:
             sequences = parse_msf("temp_input.msf")
         except Exception as e:
-            return f"""
-            <html>
-            <head>
-              <meta name="viewport" content="width=device-width, initial-scale=1">
-              <title>Error</title>
-              <style> body {{ font-family: Arial, sans-serif; padding: 20px; }} </style>
-            </head>
-            <body>
-              <p>Error reading alignment file: {e}</p>
-              <a href="/">Go Back</a>
-            </body>
-            </html>
-            """
+            return _html_page(_MESSAGE_TEMPLATE.render(
+                title="Error", message=f"Error reading alignment file: {e}",
+                back_url="/").encode())
         plain_text = plain_text_alignment(sequences, line_length=60)
-        return f"""
-        <html>
-        <head>
-          <meta name="viewport" content="width=device-width, initial-scale=1">
-          <title>Edit Alignment</title>
-          <style>
-            body {{ font-family: Arial, sans-serif; padding: 20px; }}
-            textarea {{ width: 100%; max-width: 600px; height: 300px; font-family: monospace; }}
-            button {{ padding: 10px 20px; font-size: 16px; }}
-          </style>
-        </head>
-        <body>
-          <h1>Edit Alignment</h1>
-          <form method="POST" action="/edit">
-            <textarea name="alignment_text">{plain_text}</textarea>
-            <br><br>
-            <button type="submit">Recheck Alignment</button>
-          </form>
-          <br>
-          <a href="/">Go Back</a>
-        </body>
-        </html>
-        """
+        return _html_page(_EDIT_TEMPLATE.render(plain_text=plain_text).encode())
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,94 @@
+// Posts the alignment form to /align/stream and shows MultiAlin's progress,
+// then the DOC alignment, as the server-sent events arrive. Browsers that
+// cannot read a streamed response post the form to / as before.
+(function () {
+  var form = document.getElementById("align-form");
+  if (!form || !window.fetch || !window.TextDecoder || !window.ReadableStream) {
+    return;
+  }
+  var status = document.getElementById("status");
+  var section = document.getElementById("result");
+  var result = document.getElementById("alignment");
+  var links = document.getElementById("result-links");
+
+  form.addEventListener("submit", function (e) {
+    e.preventDefault();
+    var finished = false;
+    status.textContent = "Submitting...";
+    result.textContent = "";
+    section.hidden = true;
+    links.hidden = true;
+
+    function fail() {
+      status.textContent = "The connection closed before the alignment finished.";
+    }
+
+    function dispatch(block) {
+      var event = "message";
+      var data = [];
+      block.split("\n").forEach(function (line) {
+        if (line.indexOf("event: ") === 0) {
+          event = line.slice(7);
+        } else if (line.indexOf("data: ") === 0) {
+          data.push(line.slice(6));
+        }
+      });
+      data = data.join("\n");
+      if (event === "progress") {
+        status.textContent = data;
+      } else if (event === "error") {
+        finished = true;
+        status.textContent = data;
+      } else if (event === "alignment") {
+        // Each piece is whole lines of the <pre> block, with their markup
+        // complete, so it is parsed once and appended
+        section.hidden = false;
+        result.insertAdjacentHTML("beforeend", data);
+      } else if (event === "done") {
+        finished = true;
+        status.textContent = "";
+        section.hidden = false;
+        links.hidden = false;
+      }
+    }
+
+    function read(response) {
+      // Error pages (a 413 for an oversized paste, a 500) are not event
+      // streams; let the regular form post show them
+      if (!response.ok) {
+        form.submit();
+        return;
+      }
+      var reader = response.body.getReader();
+      var decoder = new TextDecoder();
+      var buffer = "";
+      function pump() {
+        return reader.read().then(function (chunk) {
+          if (chunk.done) {
+            // A stream cut short, e.g. by a worker restart, never sends it
+            if (!finished) {
+              fail();
+            }
+            return;
+          }
+          buffer += decoder.decode(chunk.value, {stream: true});
+          var end;
+          while ((end = buffer.indexOf("\n\n")) !== -1) {
+            dispatch(buffer.slice(0, end));
+            buffer = buffer.slice(end + 2);
+          }
+          return pump();
+        });
+      }
+      return pump();
+    }
+
+    // Only a request that never got a response falls back to the form post;
+    // a failure once the stream has started would run the alignment again
+    fetch("/align/stream", {method: "POST", body: new FormData(form)})
+      .then(read, function () {
+        form.submit();
+      })
+      .catch(fail);
+  });
+})();
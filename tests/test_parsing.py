@@ -0,0 +1,110 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+
+
+class ParseEditableAlignmentTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        sequences = [("s1", "ACGT-" * 30), ("s2", "AC-TT" * 30)]
+        text = app.plain_text_alignment(sequences)
+        self.assertEqual(app.parse_editable_alignment(text), sequences)
+
+    def test_crlf_blocks(self):
+        # Browsers post textarea contents with CRLF line breaks
+        text = "s1\r\nACGT\r\nAC\r\n\r\ns2\r\nAC-T\r\nTT\r\n"
+        self.assertEqual(app.parse_editable_alignment(text),
+                         [("s1", "ACGTAC"), ("s2", "AC-TTT")])
+
+    def test_whitespace_only_separator(self):
+        text = "s1\nACGT\n  \t\ns2\nAC-T\n \r\n\ns3\nTTTT"
+        self.assertEqual(app.parse_editable_alignment(text),
+                         [("s1", "ACGT"), ("s2", "AC-T"), ("s3", "TTTT")])
+
+    def test_name_only_block(self):
+        text = "s1\nACGT\n\n  s2  \n\ns3\n AC GT \n"
+        self.assertEqual(app.parse_editable_alignment(text),
+                         [("s1", "ACGT"), ("s2", ""), ("s3", "ACGT")])
+
+    def test_empty_text(self):
+        self.assertEqual(app.parse_editable_alignment(""), [])
+        self.assertEqual(app.parse_editable_alignment(" \r\n\r\n "), [])
+
+
+MSF = """\
+PileUp  (see https://www.example.org/msf//format)
+
+   MSF:   12  Type: P    Check:  1234   ..
+
+ Name: 1ABC  Len:   12  Check:  1111 Weight:  1.00
+ Name: seq2  Len:   12  Check:  2222 Weight:  1.00
+
+   //
+
+            1            12
+1ABC        ACDEF GHIK-L
+seq2        ACD-F GH IKL
+Consensus   ACD.F GHIK.L
+consensus   ACD.F GHIK.L
+
+            13           24
+1ABC        MN
+seq2        MP
+CONSENSUS   M.
+"""
+
+
+class HeaderAndMsfParsingTest(unittest.TestCase):
+
+    def write(self, data):
+        fd, path = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data.encode())
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_indented_marker_after_url(self):
+        # The "//" inside the header URL does not start its line; the
+        # indented "   //" line does
+        section = app.read_alignment_section(self.write(MSF))
+        self.assertTrue(section.startswith("\n            1            12\n"))
+
+    def test_marker_at_file_start_and_end(self):
+        self.assertEqual(app.read_alignment_section(self.write("//\nA\n")), "A\n")
+        self.assertEqual(app.read_alignment_section(self.write("head\n //")), "")
+
+    def test_no_marker(self):
+        self.assertIsNone(app.read_alignment_section(self.write("A http://x\n/ /\n")))
+        self.assertIsNone(app.read_alignment_section(self.write("")))
+
+    def test_line_endings(self):
+        expected = app.read_alignment_section(self.write(MSF))
+        for newline in ("\r\n", "\r"):
+            path = self.write(MSF.replace("\n", newline))
+            self.assertEqual(app.read_alignment_section(path), expected, repr(newline))
+
+    def test_parse_msf(self):
+        # 1ABC starts with a digit but is a name; the digit-only ruler lines
+        # and the Consensus lines in any of their spellings are skipped
+        expected = [("1ABC", "ACDEFGHIK-LMN"), ("seq2", "ACD-FGHIKLMP")]
+        for newline in ("\n", "\r\n", "\r"):
+            path = self.write(MSF.replace("\n", newline))
+            self.assertEqual(app.parse_msf(path), expected, repr(newline))
+
+    def test_parse_msf_without_header(self):
+        path = self.write("s1 AC GT\n2 4\ns2 ACG-\n\ns1 TT\ns2 T-\n")
+        self.assertEqual(app.parse_msf(path), [("s1", "ACGTTT"), ("s2", "ACG-T-")])
+
+    def test_convert_doc_to_html(self):
+        path = self.write("MultiAlin\n//\nA [BC](D)][E)(F\n")
+        self.assertEqual(app.convert_doc_to_html(path),
+                         b'<pre>A <em class="high">BC</em><em class="low">D</em>EF\n</pre>')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import collections
+import os
+import random
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+
+
+def reference_snippet(sequences, chunk_size=60, high_thresh=0.90, low_thresh=0.50):
+    """
+    The original per-character algorithm (a Counter per column, most_common
+    tie-break), with runs of equally classed residues grouped per line the way
+    the optimised renderers group them. Ragged rows are padded with spaces for
+    the consensus only.
+    """
+    align_len = max(len(seq) for _, seq in sequences)
+    rows = [seq.ljust(align_len) for _, seq in sequences]
+    classes = [[0] * align_len for _ in rows]
+    for col in range(align_len):
+        char, count = collections.Counter(row[col] for row in rows).most_common(1)[0]
+        if char in ('-', ' '):
+            continue
+        freq = count / len(rows)
+        cls = 2 if freq >= high_thresh else 1 if freq >= low_thresh else 0
+        for r, row in enumerate(rows):
+            if row[col] == char:
+                classes[r][col] = cls
+    out = [b"<pre class='seq'>"]
+    for (name, seq), row, row_class in zip(sequences, rows, classes):
+        # The padding takes part in the consensus but is not printed
+        block = [f"{name}\n".encode()]
+        for start in range(0, len(seq), chunk_size):
+            end = min(start + chunk_size, len(seq))
+            col = start
+            while col < end:
+                run = col
+                while run < end and row_class[run] == row_class[col]:
+                    run += 1
+                cls = row_class[col]
+                block += [app.OPEN_TAGS[cls], row[col:run].encode(), app.CLOSE_TAGS[cls]]
+                col = run
+            block.append(b"\n")
+        block.append(b"\n")
+        out.append(b"".join(block))
+    out.append(b"</pre>")
+    return b"".join(out)
+
+
+def random_alignments(seed, count=150):
+    rng = random.Random(seed)
+    kinds = {
+        # Gaps and padding holding many columns, including exact halves
+        "gaps": "A--- ",
+        # Two residues in even row counts, so most columns are ties
+        "ties": "AC",
+        "mixed": "ACDEFG-",
+    }
+    for _ in range(count):
+        alphabet = kinds[rng.choice(sorted(kinds))]
+        num_seqs = rng.choice([1, 2, 4, 6, 9])
+        align_len = rng.randint(1, 200)
+        base = [rng.choice(alphabet) for _ in range(align_len)]
+        sequences = []
+        for i in range(num_seqs):
+            row = "".join(c if rng.random() < 0.6 else rng.choice(alphabet) for c in base)
+            # Ragged rows, as an edited alignment can have
+            if rng.random() < 0.3:
+                row = row[:rng.randint(0, align_len)]
+            sequences.append((f"s{i}", row))
+        yield sequences
+
+
+class SnippetRenderingTest(unittest.TestCase):
+
+    def render_fallback(self, sequences):
+        with mock.patch.object(app, "_score_columns", None), \
+                mock.patch.object(app, "_emit_row", None):
+            return app.mode3_full_snippet(sequences)
+
+    def test_fallback_matches_reference(self):
+        for sequences in random_alignments(1):
+            self.assertEqual(self.render_fallback(sequences), reference_snippet(sequences),
+                             sequences)
+
+    @unittest.skipIf(app.numba is None, "numba is not installed")
+    def test_numba_matches_fallback(self):
+        for sequences in random_alignments(2):
+            self.assertEqual(app.mode3_full_snippet(sequences), self.render_fallback(sequences),
+                             sequences)
+
+    def test_ragged_rows_are_not_padded(self):
+        sequences = [("s1", "ACDEF"), ("s2", "ACDEF"), ("s3", "ACD")]
+        for html in (app.mode3_full_snippet(sequences), self.render_fallback(sequences)):
+            self.assertIn(b"s3\n<em class='high'>ACD</em>\n\n", html)
+
+    def test_empty_alignment(self):
+        self.assertEqual(self.render_fallback([]), b"<p>No alignment results available.</p>")
+
+
+if __name__ == '__main__':
+    unittest.main()
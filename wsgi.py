@@ -0,0 +1,9 @@
+from app import app
+
+# Run with: gunicorn -w 4 -k gthread --threads 8 --timeout 300 --preload wsgi:app
+# --preload imports app (NumPy, and the Numba kernel when available) once in the
+# master process, so forked workers start warm.
+# Threaded workers keep one /align/stream response from holding a whole worker
+# for the length of an alignment, and keep heartbeating while it streams; a
+# sync worker would be killed once a run outlasts the default 30 s timeout.
+# --timeout still bounds a worker that stops responding altogether.